@@ -0,0 +1,412 @@
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
+from openai import AsyncOpenAI
+import os
+import time
+import asyncio
+import orjson
+import httpx
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from .proxy_config import ProxyMonitoring, ProxyAPIConfig
+from .settings import get_settings
+
+# Configure logging; per-request logs are DEBUG, so set LOGLEVEL=debug to see them
+logging.basicConfig(level=get_settings().loglevel.upper())
+logger = logging.getLogger(__name__)
+
+# Upstream Endpoints
+OLLAMA_BASE_URL = "http://localhost:11434/v1"
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Cheap endpoints hit at startup to open keep-alive connections
+OLLAMA_WARMUP_URL = "http://localhost:11434/api/tags"
+OPENROUTER_WARMUP_URL = f"{OPENROUTER_BASE_URL}/models"
+WARMUP_TIMEOUT = 2.0
+
+def create_client_with_proxy(base_url: str, api_key: str, http_client: httpx.AsyncClient) -> AsyncOpenAI:
+    """Create an async OpenAI client on top of the shared (optionally proxied) HTTP client"""
+    if ProxyMonitoring.USE_PROXY:
+        logger.info(f"Created client for {base_url} with proxy configuration")
+    else:
+        logger.info(f"Created client for {base_url} without proxy")
+
+    return AsyncOpenAI(
+        base_url=base_url,
+        api_key=api_key,
+        http_client=http_client
+    )
+
+class ChatRequest(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore')
+
+    message: str
+    show_reasoning: bool = True
+    model: Optional[str] = None  # Defaults to the app's response model
+
+class RequestIDs(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore')
+
+    reasoning: Optional[str] = None
+    response: Optional[str] = None
+
+class ChatResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore')
+
+    reasoning: str
+    response: str
+    model: str
+    elapsed_time: float
+    request_ids: RequestIDs = Field(default_factory=RequestIDs)  # Store request IDs for tracing
+
+def extract_think_block(content: str) -> str:
+    """Return the text inside <think>...</think>, or the whole content if there is no block"""
+    # Keep in step with ThinkTagParser so streamed and non-streamed reasoning match
+    start = content.find(ThinkTagParser.OPEN_TAG)
+    if start == -1:
+        return content.strip()
+    start += len(ThinkTagParser.OPEN_TAG)
+    end = content.find(ThinkTagParser.CLOSE_TAG, start)
+    # An unterminated block runs to the end of the completion
+    return content[start:end if end != -1 else None].strip()
+
+class ThinkTagParser:
+    """Incrementally extract the <think>...</think> block from a streamed completion"""
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self.pending = ""  # Text not yet emitted; may end in a partial close tag
+        self.started = False
+        self.done = False
+        self.parts = []
+
+    @property
+    def reasoning(self) -> str:
+        return "".join(self.parts).strip()
+
+    def feed(self, delta: str) -> str:
+        """Consume a streamed delta and return the reasoning text that is safe to emit"""
+        if self.done:
+            return ""
+        self.pending += delta
+
+        if not self.started:
+            head = self.pending.lstrip()
+            if len(head) < len(self.OPEN_TAG) and self.OPEN_TAG.startswith(head):
+                return ""  # Could still be the opening tag
+            # Without an opening tag the whole completion is treated as reasoning
+            self.pending = head[len(self.OPEN_TAG):].lstrip() if head.startswith(self.OPEN_TAG) else head
+            self.started = True
+
+        end = self.pending.find(self.CLOSE_TAG)
+        if end != -1:
+            text, self.pending = self.pending[:end].rstrip(), ""
+            self.done = True
+        else:
+            # Hold back just enough characters to catch a close tag split across deltas,
+            # plus any trailing whitespace in case it turns out to end the block
+            cut = len(self.pending[:max(len(self.pending) - len(self.CLOSE_TAG) + 1, 0)].rstrip())
+            text, self.pending = self.pending[:cut], self.pending[cut:]
+        return self._emit(text)
+
+    def finish(self) -> str:
+        """Flush whatever is left once the stream ends without a close tag"""
+        text, self.pending = self.pending.rstrip(), ""
+        self.done = True
+        return self._emit(text)
+
+    def _emit(self, text: str) -> str:
+        if not self.parts:
+            text = text.lstrip()  # Reasoning is stripped at both ends, like extract_think_block
+        if text:
+            self.parts.append(text)
+        return text
+
+class ModelChain:
+    def __init__(self, http_client: httpx.AsyncClient, reasoning_model: str, upstream: str):
+        self.reasoning_model = reasoning_model
+        self.upstream = upstream
+        self.upstream_name = "OpenRouter" if upstream == ProxyAPIConfig.OPENROUTER else "Ollama"
+
+        # Initialize clients with proxy support
+        self.ollama_client = create_client_with_proxy(
+            base_url=OLLAMA_BASE_URL,
+            api_key='ollama',
+            http_client=http_client
+        )
+
+        if upstream == ProxyAPIConfig.OPENROUTER:
+            self.response_client = create_client_with_proxy(
+                base_url=OPENROUTER_BASE_URL,
+                api_key=get_settings().openrouter_api_key,
+                http_client=http_client
+            )
+        else:
+            self.response_client = self.ollama_client
+
+    def _reasoning_request(self, user_input: str) -> dict:
+        return {
+            "model": self.reasoning_model,
+            "messages": [
+                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "user", "content": user_input}
+            ]
+        }
+
+    def _response_request(self, user_input: str, reasoning: str, model: str) -> dict:
+        if self.upstream == ProxyAPIConfig.OPENROUTER:
+            return {
+                "model": model,
+                "messages": [
+                    {"role": "user", "content": user_input},
+                    {"role": "assistant", "content": f"<thinking>{reasoning}</thinking>"}
+                ],
+                "max_tokens": 8000
+            }
+        return {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": "You are a helpful assistant that provides clear, accurate, and well-structured responses."},
+                {"role": "user", "content": user_input},
+                {"role": "assistant", "content": f"<thinking>{reasoning}</thinking>"},
+                {"role": "user", "content": "Based on this reasoning, please provide a clear and comprehensive response."}
+            ]
+        }
+
+    async def get_deepseek_reasoning(self, user_input: str) -> tuple[str, Optional[str]]:
+        try:
+            logger.debug("Making request to Ollama for reasoning using %s", self.reasoning_model)
+            response = await self.ollama_client.chat.completions.create(
+                **self._reasoning_request(user_input)
+            )
+
+            request_id = response.id
+            logger.debug("Received response from Ollama (ID: %s)", request_id)
+
+            return extract_think_block(response.choices[0].message.content), request_id
+        except Exception as e:
+            logger.error(f"Error in reasoning request: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error getting reasoning: {str(e)}")
+
+    async def stream_deepseek_reasoning(self, user_input: str, parser: ThinkTagParser,
+                                        request_ids: dict) -> AsyncIterator[str]:
+        """Stream reasoning tokens, stopping as soon as the think block closes"""
+        logger.debug("Streaming reasoning from Ollama")
+        stream = await self.ollama_client.chat.completions.create(
+            **self._reasoning_request(user_input),
+            stream=True
+        )
+        try:
+            async for chunk in stream:
+                request_ids["reasoning"] = chunk.id
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                text = parser.feed(chunk.choices[0].delta.content)
+                if text:
+                    yield text
+                if parser.done:
+                    break  # The answer after </think> isn't needed
+            text = parser.finish()
+            if text:
+                yield text
+        finally:
+            await stream.close()
+
+    async def get_final_response(self, user_input: str, reasoning: str, model: str) -> tuple[str, Optional[str]]:
+        try:
+            logger.debug("Making request to %s for final response using %s", self.upstream_name, model)
+            response = await self.response_client.chat.completions.create(
+                **self._response_request(user_input, reasoning, model)
+            )
+
+            # Add detailed response logging; the repr is several KB, so skip building it unless needed
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s raw response: %r", self.upstream_name, response)
+
+            if not hasattr(response, 'choices') or not response.choices:
+                logger.error("Invalid response format from %s: %r", self.upstream_name, response)
+                raise ValueError(f"Invalid response format from {self.upstream_name}")
+
+            request_id = response.id
+            logger.debug("Received response from %s (ID: %s)", self.upstream_name, request_id)
+
+            return response.choices[0].message.content, request_id
+        except Exception as e:
+            logger.error(f"Error in {self.upstream_name} request: {str(e)}")
+            logger.error(f"Full error details: {repr(e)}")
+            raise HTTPException(status_code=500, detail=f"Error getting response: {str(e)}")
+
+    async def stream_final_response(self, user_input: str, reasoning: str, model: str,
+                                    request_ids: dict) -> AsyncIterator[str]:
+        """Stream the final response from the response upstream"""
+        logger.debug("Streaming final response from %s using %s", self.upstream_name, model)
+        stream = await self.response_client.chat.completions.create(
+            **self._response_request(user_input, reasoning, model),
+            stream=True
+        )
+        try:
+            async for chunk in stream:
+                request_ids["response"] = chunk.id
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+async def stream_chat(request: ChatRequest, model: str, model_chain: ModelChain) -> AsyncIterator[bytes]:
+    """Run the chain, emitting newline-delimited JSON events as tokens arrive"""
+    start_time = time.time()
+    request_ids = {}
+    parser = ThinkTagParser()
+    try:
+        async for text in model_chain.stream_deepseek_reasoning(request.message, parser, request_ids):
+            if request.show_reasoning:
+                yield orjson.dumps({"type": "reasoning", "content": text}) + b"\n"
+
+        async for text in model_chain.stream_final_response(
+            request.message,
+            parser.reasoning,
+            model,
+            request_ids
+        ):
+            yield orjson.dumps({"type": "response", "content": text}) + b"\n"
+
+        elapsed_time = time.time() - start_time
+        logger.debug("Streamed request completed in %.2f seconds", elapsed_time)
+        yield orjson.dumps({
+            "type": "done",
+            "model": model,
+            "elapsed_time": elapsed_time,
+            "request_ids": request_ids
+        }) + b"\n"
+    except Exception as e:
+        logger.error(f"Error streaming request: {str(e)}")
+        yield orjson.dumps({"type": "error", "detail": str(e)}) + b"\n"
+
+async def warm_connections(http_client: httpx.AsyncClient, upstream: str):
+    """Open pooled connections to the upstreams so the first request skips the TCP/TLS handshake"""
+    urls = [OLLAMA_WARMUP_URL]
+    if upstream == ProxyAPIConfig.OPENROUTER:
+        urls.append(OPENROUTER_WARMUP_URL)
+
+    results = await asyncio.gather(
+        *(http_client.head(url, timeout=WARMUP_TIMEOUT) for url in urls),
+        return_exceptions=True
+    )
+    for url, result in zip(urls, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Could not pre-warm connection to {url}: {str(result)}")
+
+def build_app(reasoning_model: str, response_model: str, upstream: str = ProxyAPIConfig.OPENROUTER,
+              title: str = "Reasoning Mashup API",
+              description: str = "Local API for the Reasoning Mashup LLM chain") -> FastAPI:
+    """Build a reasoning chain API that answers through the given upstream (openrouter or ollama)"""
+    if upstream not in (ProxyAPIConfig.OPENROUTER, ProxyAPIConfig.OLLAMA):
+        raise ValueError(f"Unknown upstream: {upstream}")
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """Share a single pooled HTTP client across all requests and upstream calls"""
+        app.state.http = httpx.AsyncClient(
+            # Keep idle connections long enough for pre-warmed ones to see real traffic
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=120),
+            timeout=None,
+            **ProxyMonitoring.get_client_config()
+        )
+        await warm_connections(app.state.http, upstream)
+        app.state.model_chain = ModelChain(app.state.http, reasoning_model, upstream)
+        try:
+            yield
+        finally:
+            await app.state.http.aclose()
+
+    app = FastAPI(
+        title=title,
+        description=description,
+        version="1.0.0",
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan
+    )
+
+    @app.post("/chat", response_model=ChatResponse)
+    async def chat(request: ChatRequest, stream: bool = False):
+        """
+        Chat endpoint that processes messages through the reasoning chain.
+
+        Parameters:
+        - message: The user's input message
+        - show_reasoning: Whether to include reasoning in the response (default: True)
+        - stream: Query flag; stream newline-delimited JSON events instead (default: False)
+        - model: The model to use for the final response (default: the app's response model)
+
+        Returns:
+        - reasoning: The reasoning process from the first model
+        - response: The final response from the second model
+        - model: The model used for the final response
+        - elapsed_time: Time taken to process the request
+        - request_ids: Reasoning and response request IDs for tracing
+
+        When streaming, each line is a JSON event: "reasoning" and "response" events
+        carry token text in "content", followed by a final "done" (or "error") event.
+        """
+        start_time = time.time()
+        model_chain = app.state.model_chain
+        model = request.model or response_model
+        logger.debug("Processing chat request: %.100s...", request.message)
+
+        if stream:
+            return StreamingResponse(
+                stream_chat(request, model, model_chain),
+                media_type="application/x-ndjson"
+            )
+
+        try:
+            # Get reasoning from first model
+            reasoning, reasoning_id = await model_chain.get_deepseek_reasoning(request.message)
+
+            # Get response from second model
+            response, response_id = await model_chain.get_final_response(
+                request.message,
+                reasoning,
+                model
+            )
+
+            elapsed_time = time.time() - start_time
+            logger.debug("Request completed in %.2f seconds", elapsed_time)
+
+            return ChatResponse(
+                reasoning=reasoning if request.show_reasoning else "",
+                response=response,
+                model=model,
+                elapsed_time=elapsed_time,
+                request_ids=RequestIDs(
+                    reasoning=reasoning_id,
+                    response=response_id
+                )
+            )
+        except Exception as e:
+            logger.error(f"Error processing request: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @app.get("/health")
+    async def health_check():
+        """Health check endpoint"""
+        return {"status": "healthy"}
+
+    return app
+
+def serve(app_path: str, port: int):
+    """Run an app with one uvicorn worker per CPU"""
+    import uvicorn
+    logger.info("Starting API server...")
+    uvicorn.run(
+        app_path,  # Workers import the app themselves, so pass it by path
+        host="0.0.0.0",
+        port=port,
+        workers=os.cpu_count() or 1,
+        loop="auto",  # uvloop when installed (everywhere but Windows)
+        http="auto",  # httptools when installed
+        log_config=None  # Keep the logging configured above
+    )
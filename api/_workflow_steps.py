@@ -0,0 +1,40 @@
+from functools import partial
+from praisonaiagents import Task
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Upper bound on previous analysis passed to a synthesis prompt
+MAX_CONTEXT_CHARS = 8000
+
+def record_step(step: int, task: Task, result: Optional[dict], log: Callable,
+                summarize: Optional[Callable[[str], str]] = None) -> Tuple[Dict, str]:
+    """Build a step's result and its contribution to the synthesis context
+
+    log is the caller's per-run logger, so sessions sharing one workflow each
+    log to their own output. summarize, if given, shortens the response for the
+    context only; the step result keeps it in full.
+    """
+    if result:
+        log(f"✅ Step {step} complete")
+        log(f"⏱️  Time taken: {result.get('elapsed_time', 0)}s")
+        response = result.get("response", "")
+        step_result = {
+            "reasoning": result.get("reasoning", ""),
+            "response": response,
+            "time": result.get("elapsed_time", 0)
+        }
+        if summarize:
+            response = summarize(response)
+        return step_result, f"\n\nPrevious Step ({task.agent.name}):\n{response}"
+
+    log(f"❌ Step {step} failed")
+    return {"error": "Task failed"}, ""
+
+def join_context(chunks: List[str], limit: int = MAX_CONTEXT_CHARS) -> str:
+    """Join step contexts in order, giving each an equal share of the limit so none crowds out the rest"""
+    # Failed steps contribute nothing, so split the limit among the ones that did
+    budget = limit // max(sum(1 for chunk in chunks if chunk), 1)
+    return "".join(chunk[:budget] for chunk in chunks)
+
+def step_tokens(on_token: Optional[Callable[[str, str, str], None]], task: Task) -> Optional[Callable[[str, str], None]]:
+    """Bind a workflow's on_token(step, kind, text) callback to one task's step"""
+    return partial(on_token, task.description) if on_token else None
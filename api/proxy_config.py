@@ -1,19 +1,20 @@
-from typing import Optional, Callable
-import requests
+from typing import Optional, Callable, AsyncIterator
 import logging
 import httpx
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+import asyncio
+import weakref
+import threading
+import hashlib
+import orjson
+from collections import OrderedDict
+from .settings import get_settings
 
 logger = logging.getLogger(__name__)
 
 class ProxyMonitoring:
     """Configuration for mitmproxy monitoring"""
-    MITMPROXY_URL = "http://127.0.0.1:8080"
-    USE_PROXY = os.getenv("USE_PROXY", "false").lower() == "true"
+    MITMPROXY_URL = get_settings().mitmproxy_url
+    USE_PROXY = get_settings().use_proxy
     
     @staticmethod
     def get_client_config():
@@ -28,6 +29,22 @@ class ProxyMonitoring:
             }
         return {}
 
+# One pooled client per event loop; connections can't be shared across loops
+_shared_clients = weakref.WeakKeyDictionary()
+
+def get_shared_client() -> httpx.AsyncClient:
+    """Get the pooled httpx client bound to the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _shared_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            timeout=None,
+            **ProxyMonitoring.get_client_config()
+        )
+        _shared_clients[loop] = client
+    return client
+
 class ProxyAPIConfig:
     """Configuration for different proxy APIs"""
     OPENROUTER = "openrouter"
@@ -45,40 +62,157 @@ class ProxyAPIConfig:
 
 class ProxyAPITool:
     """Tool to interact with configurable proxy APIs"""
-    def __init__(self, api_type: str = "openrouter", logger: Optional[Callable] = None):
+    # Results shared by every tool instance, keyed on (api_type, model, prompt digest)
+    CACHE_SIZE = 256
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()  # The cache is process-wide, not tied to one event loop or thread
+    
+    def __init__(self, api_type: str = "openrouter", logger: Optional[Callable] = None,
+                 client: Optional[httpx.AsyncClient] = None):
         self.api_type = api_type
         self.api_url = ProxyAPIConfig.get_api_url(api_type)
         self.logger = logger or print
+        self.client = client
+        
+        # Both proxies expect the same format; only the message changes per call
+        self._payload_skeleton = {
+            "show_reasoning": True,
+            "model": "anthropic/claude-3-sonnet:beta" if api_type == ProxyAPIConfig.OPENROUTER else "deepseek-r1:8b"
+        }
+    
+    def _cache_key(self, input_data: str) -> tuple:
+        digest = hashlib.blake2b(input_data.encode(), digest_size=16).digest()
+        return (self.api_type, self._payload_skeleton["model"], digest)
+    
+    def _cache_get(self, key: tuple) -> Optional[dict]:
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+            return cached
+    
+    def _cache_put(self, key: tuple, result: dict):
+        with self._cache_lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+    
+    @staticmethod
+    def _stream_result(parts: dict, done: dict) -> dict:
+        """Assemble streamed token text and the final "done" event into a normal response"""
+        return {
+            "reasoning": "".join(parts["reasoning"]),
+            "response": "".join(parts["response"]),
+            "model": done.get("model"),
+            "elapsed_time": done.get("elapsed_time", 0),
+            "request_ids": done.get("request_ids", {})
+        }
     
-    async def execute(self, input_data: str) -> dict:
+    async def execute(self, input_data: str, no_cache: bool = False,
+                      logger: Optional[Callable] = None,
+                      on_token: Optional[Callable[[str, str], None]] = None) -> dict:
+        log = logger or self.logger
+        if on_token is not None:
+            # Stream instead, handing each ("reasoning" | "response", text) token to on_token
+            parts = {"reasoning": [], "response": []}
+            async for event in self.execute_stream(input_data, no_cache, log):
+                kind = event.get("type")
+                if kind in parts:
+                    parts[kind].append(event["content"])
+                    on_token(kind, event["content"])
+                elif kind == "done":
+                    return self._stream_result(parts, event)
+            return None
+        
+        key = self._cache_key(input_data)
+        cached = None if no_cache else self._cache_get(key)
+        if cached is not None:
+            log(f"♻️ Using cached {self.api_type} proxy API response")
+            return dict(cached)
+        
         try:
-            self.logger(f"🔄 Sending request to {self.api_type} proxy API...")
+            log(f"🔄 Sending request to {self.api_type} proxy API...")
+            
+            # Reuse the injected client, or the pooled one for this event loop
+            client = self.client or get_shared_client()
             
-            # Both proxies expect the same format
-            payload = {
-                "message": input_data,
-                "show_reasoning": True,
-                "model": "anthropic/claude-3-sonnet:beta" if self.api_type == ProxyAPIConfig.OPENROUTER else "deepseek-r1:8b"
+            response = await client.post(
+                f"{self.api_url}/chat",
+                content=orjson.dumps({**self._payload_skeleton, "message": input_data}),
+                headers={"Content-Type": "application/json"},
+                timeout=None
+            )
+            
+            if response.status_code == 200:
+                log(f"✅ Received response from {self.api_type} proxy API")
+                result = orjson.loads(response.content)
+                self._cache_put(key, result)
+                return dict(result)
+            else:
+                log(f"⚠️ API returned status code: {response.status_code}")
+                log(f"Response content: {response.text}")
+                return None
+                
+        except Exception as e:
+            log(f"⚠️ Error calling {self.api_type} proxy API: {str(e)}")
+            return None 
+    
+    async def execute_stream(self, input_data: str, no_cache: bool = False,
+                             logger: Optional[Callable] = None) -> AsyncIterator[dict]:
+        """Yield the proxy API's reasoning/response/done events as they arrive"""
+        log = logger or self.logger
+        key = self._cache_key(input_data)
+        cached = None if no_cache else self._cache_get(key)
+        if cached is not None:
+            # Replay a cached response as the events a live stream would have sent
+            log(f"♻️ Using cached {self.api_type} proxy API response")
+            yield {"type": "reasoning", "content": cached.get("reasoning", "")}
+            yield {"type": "response", "content": cached.get("response", "")}
+            yield {
+                "type": "done",
+                "model": cached.get("model"),
+                "elapsed_time": cached.get("elapsed_time", 0),
+                "request_ids": cached.get("request_ids", {})
             }
+            return
+        
+        parts = {"reasoning": [], "response": []}
+        try:
+            log(f"🔄 Streaming request from {self.api_type} proxy API...")
             
-            # Get client config with proxy if enabled
-            client_config = ProxyMonitoring.get_client_config()
+            client = self.client or get_shared_client()
             
-            async with httpx.AsyncClient(**client_config) as client:
-                response = await client.post(
-                    f"{self.api_url}/chat",
-                    json=payload,
-                    timeout=None
-                )
+            async with client.stream(
+                "POST",
+                f"{self.api_url}/chat",
+                params={"stream": "true"},
+                content=orjson.dumps({**self._payload_skeleton, "message": input_data}),
+                headers={"Content-Type": "application/json"},
+                timeout=None
+            ) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    log(f"⚠️ API returned status code: {response.status_code}")
+                    log(f"Response content: {response.text}")
+                    yield {"type": "error", "detail": f"API returned status code: {response.status_code}"}
+                    return
                 
-                if response.status_code == 200:
-                    self.logger(f"✅ Received response from {self.api_type} proxy API")
-                    return response.json()
-                else:
-                    self.logger(f"⚠️ API returned status code: {response.status_code}")
-                    self.logger(f"Response content: {response.text}")
-                    return None
+                # One JSON event per line
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    event = orjson.loads(line)
+                    kind = event.get("type")
+                    if kind in parts:
+                        parts[kind].append(event["content"])
+                    elif kind == "done":
+                        # Cached like execute's results, so either call can reuse the other's response
+                        self._cache_put(key, self._stream_result(parts, event))
+                    yield event
+            
+            log(f"✅ Finished streaming from {self.api_type} proxy API")
                 
         except Exception as e:
-            self.logger(f"⚠️ Error calling {self.api_type} proxy API: {str(e)}")
-            return None 
\ No newline at end of file
+            log(f"⚠️ Error streaming from {self.api_type} proxy API: {str(e)}")
+            yield {"type": "error", "detail": str(e)}
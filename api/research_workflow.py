@@ -1,32 +1,72 @@
 from praisonaiagents import Agent, Task, PraisonAIAgents
 import asyncio
-import requests
-from dotenv import load_dotenv
-from duckduckgo_search import DDGS
-from typing import List, Dict, Optional, Callable
+from typing import Dict, Optional, Callable, AsyncIterator, Tuple
 from .proxy_config import ProxyAPITool, ProxyAPIConfig
+from .search import internet_search_tool
+from ._workflow_steps import record_step, join_context, step_tokens
 
-# Load environment variables
-load_dotenv()
+# Prompt text that doesn't depend on the topic, built once at import
+TASK_PROMPT_BODY = """Your Task: {description}
+As a {role}, analyze this topic and provide:
+1. Detailed analysis based on your expertise
+2. Key findings and insights
+3. Recommendations for next steps
+
+Be thorough and analytical in your response."""
+
+STATIC_SYNTH_BODY = """Your task is to synthesize all previous analyses into a clear, comprehensive final report.
+Follow this structure:
+
+EXECUTIVE SUMMARY
+- Brief overview of key findings
+- Major implications
+- Critical recommendations
+
+COMPREHENSIVE RESEARCH REPORT
+1. Introduction
+   - Research context
+   - Objectives
+   - Scope
 
-def internet_search_tool(query: str) -> List[Dict]:
-    """DuckDuckGo search tool"""
-    results = []
-    try:
-        ddgs = DDGS()
-        for result in ddgs.text(keywords=query, max_results=5):
-            results.append({
-                "title": result.get("title", ""),
-                "url": result.get("link", ""),
-                "snippet": result.get("body", "")
-            })
-    except Exception as e:
-        print(f"⚠️ Search error: {str(e)}")
-    return results
+2. Literature Review Summary
+   - Current state of knowledge
+   - Key theories and concepts
+   - Recent developments
+
+3. Research Gaps and Opportunities
+   - Identified gaps
+   - Emerging opportunities
+   - Priority areas
+
+4. Methodology Assessment
+   - Research approaches
+   - Data collection methods
+   - Analysis techniques
+
+5. Impact Analysis
+   - Industry implications
+   - Societal impact
+   - Future predictions
+
+6. Recommendations
+   - Strategic priorities
+   - Action items
+   - Implementation considerations
+
+7. Conclusion
+   - Summary of findings
+   - Future research directions
+   - Final thoughts
+
+Format the report professionally with clear sections, subsections, and bullet points where appropriate.
+Focus on clarity, actionability, and practical implications."""
+
+SYNTH_TEMPLATE = "Research Topic: {topic}\n\nPrevious Analyses:\n{context}\n\n" + STATIC_SYNTH_BODY
 
 class LiteratureAgent(Agent):
     """Agent specialized in literature review and current research"""
-    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None):
+    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None,
+                 llm: Optional[ProxyAPITool] = None):
         self.logger = logger or print
         super().__init__(
             name="Literature Reviewer",
@@ -34,12 +74,13 @@ class LiteratureAgent(Agent):
             goal="Review and analyze current research literature and developments",
             backstory="Expert in analyzing scientific literature and research papers",
             tools=[internet_search_tool],
-            llm=ProxyAPITool(api_type=api_type, logger=logger)
+            llm=llm or ProxyAPITool(api_type=api_type, logger=logger)
         )
 
 class GapAnalysisAgent(Agent):
     """Agent specialized in identifying research gaps and opportunities"""
-    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None):
+    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None,
+                 llm: Optional[ProxyAPITool] = None):
         self.logger = logger or print
         super().__init__(
             name="Gap Analyzer",
@@ -47,12 +88,13 @@ class GapAnalysisAgent(Agent):
             goal="Identify gaps, opportunities, and unexplored areas in research",
             backstory="Expert in identifying research opportunities and potential breakthroughs",
             tools=[internet_search_tool],
-            llm=ProxyAPITool(logger=logger)
+            llm=llm or ProxyAPITool(api_type=api_type, logger=logger)
         )
 
 class MethodologyAgent(Agent):
     """Agent specialized in research methodology and experimental design"""
-    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None):
+    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None,
+                 llm: Optional[ProxyAPITool] = None):
         self.logger = logger or print
         super().__init__(
             name="Methodology Expert",
@@ -60,12 +102,13 @@ class MethodologyAgent(Agent):
             goal="Design and evaluate research methodologies and approaches",
             backstory="Expert in research design and experimental methodology",
             tools=[internet_search_tool],
-            llm=ProxyAPITool(logger=logger)
+            llm=llm or ProxyAPITool(api_type=api_type, logger=logger)
         )
 
 class ImpactAgent(Agent):
     """Agent specialized in impact assessment and future implications"""
-    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None):
+    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None,
+                 llm: Optional[ProxyAPITool] = None):
         self.logger = logger or print
         super().__init__(
             name="Impact Assessor",
@@ -73,12 +116,13 @@ class ImpactAgent(Agent):
             goal="Evaluate potential impacts and future implications of research",
             backstory="Expert in assessing research impact and future developments",
             tools=[internet_search_tool],
-            llm=ProxyAPITool(logger=logger)
+            llm=llm or ProxyAPITool(api_type=api_type, logger=logger)
         )
 
 class SynthesisAgent(Agent):
     """Agent specialized in synthesizing research findings into a final report"""
-    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None):
+    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None,
+                 llm: Optional[ProxyAPITool] = None):
         self.logger = logger or print
         super().__init__(
             name="Research Synthesizer",
@@ -86,7 +130,7 @@ class SynthesisAgent(Agent):
             goal="Create a comprehensive, well-structured final research report",
             backstory="Expert in research synthesis and technical writing",
             tools=[internet_search_tool],
-            llm=ProxyAPITool(logger=logger)
+            llm=llm or ProxyAPITool(api_type=api_type, logger=logger)
         )
 
 class ResearchWorkflow:
@@ -95,12 +139,15 @@ class ResearchWorkflow:
         self.logger = logger or print
         self.api_type = api_type
         
-        # Initialize agents with logger and API type
-        self.literature_agent = LiteratureAgent(api_type=api_type, logger=logger)
-        self.gap_agent = GapAnalysisAgent(api_type=api_type, logger=logger)
-        self.methodology_agent = MethodologyAgent(api_type=api_type, logger=logger)
-        self.impact_agent = ImpactAgent(api_type=api_type, logger=logger)
-        self.synthesis_agent = SynthesisAgent(api_type=api_type, logger=logger)
+        # One LLM tool for all agents, so every step goes to the selected API
+        self.llm = ProxyAPITool(api_type=api_type, logger=logger)
+        
+        # Initialize agents with logger and the shared LLM tool
+        self.literature_agent = LiteratureAgent(api_type=api_type, logger=logger, llm=self.llm)
+        self.gap_agent = GapAnalysisAgent(api_type=api_type, logger=logger, llm=self.llm)
+        self.methodology_agent = MethodologyAgent(api_type=api_type, logger=logger, llm=self.llm)
+        self.impact_agent = ImpactAgent(api_type=api_type, logger=logger, llm=self.llm)
+        self.synthesis_agent = SynthesisAgent(api_type=api_type, logger=logger, llm=self.llm)
         
         # Create tasks for each agent
         self.tasks = [
@@ -130,121 +177,82 @@ class ResearchWorkflow:
                 agent=self.synthesis_agent
             )
         ]
-    
-    async def process_topic(self, topic: str) -> Dict:
-        """Process a research topic through the multi-agent workflow"""
-        self.logger(f"\n🔍 Starting research workflow for: {topic}")
-        self.logger("=" * 50)
-        
-        results = {}
-        context = ""
         
-        for i, task in enumerate(self.tasks, 1):
-            self.logger(f"\n📋 Step {i}: {task.description}")
-            self.logger(f"🤖 Agent: {task.agent.name}")
-            
-            # Special handling for synthesis task
-            if task.agent == self.synthesis_agent:
-                prompt = f"""Research Topic: {topic}
-
-Previous Analyses:
-{context}
-
-Your task is to synthesize all previous analyses into a clear, comprehensive final report.
-Follow this structure:
-
-EXECUTIVE SUMMARY
-- Brief overview of key findings
-- Major implications
-- Critical recommendations
-
-COMPREHENSIVE RESEARCH REPORT
-1. Introduction
-   - Research context
-   - Objectives
-   - Scope
-
-2. Literature Review Summary
-   - Current state of knowledge
-   - Key theories and concepts
-   - Recent developments
-
-3. Research Gaps and Opportunities
-   - Identified gaps
-   - Emerging opportunities
-   - Priority areas
-
-4. Methodology Assessment
-   - Research approaches
-   - Data collection methods
-   - Analysis techniques
-
-5. Impact Analysis
-   - Industry implications
-   - Societal impact
-   - Future predictions
-
-6. Recommendations
-   - Strategic priorities
-   - Action items
-   - Implementation considerations
-
-7. Conclusion
-   - Summary of findings
-   - Future research directions
-   - Final thoughts
-
-Format the report professionally with clear sections, subsections, and bullet points where appropriate.
-Focus on clarity, actionability, and practical implications."""
-            else:
-                prompt = f"""Research Topic: {topic}
-
-Previous Analysis:
-{context}
+        # Per-task prompt text for the independent analyses
+        self._task_prompt_bodies = [
+            TASK_PROMPT_BODY.format(description=task.description, role=task.agent.role)
+            for task in self.tasks[:4]
+        ]
+    
+    def _build_task_prompt(self, index: int, topic: str) -> str:
+        """Build the prompt for an independent analysis task"""
+        return "".join(("Research Topic: ", topic, "\n\n", self._task_prompt_bodies[index]))
 
-Your Task: {task.description}
-As a {task.agent.role}, analyze this topic and provide:
-1. Detailed analysis based on your expertise
-2. Key findings and insights
-3. Recommendations for next steps
+    def _build_synthesis_prompt(self, topic: str, context: str) -> str:
+        """Build the prompt for the final synthesis task"""
+        return SYNTH_TEMPLATE.format(topic=topic, context=context)
 
-Be thorough and analytical in your response."""
+    async def _run_task(self, index: int, task: Task, topic: str, log: Callable,
+                        on_token: Optional[Callable] = None) -> Tuple[int, Task, Optional[dict]]:
+        """Run an analysis task, tagging the result with its position"""
+        prompt = self._build_task_prompt(index, topic)
+        return index, task, await self.llm.execute(prompt, logger=log, on_token=step_tokens(on_token, task))
+    
+    async def process_topic(self, topic: str, logger: Optional[Callable] = None,
+                            on_token: Optional[Callable] = None) -> AsyncIterator[Tuple[str, Dict]]:
+        """Process a research topic, yielding (step, result) pairs as each agent finishes
 
-            # Execute task
-            self.logger(f"🎯 Executing task: {task.description}")
-            result = await task.agent.llm.execute(prompt)
-            
-            if result:
-                self.logger(f"✅ Step {i} complete")
-                # Add to results
-                results[task.description] = {
-                    "reasoning": result.get("reasoning", ""),
-                    "response": result.get("response", ""),
-                    "time": result.get("elapsed_time", 0)
-                }
-                # Update context for next step
-                context += f"\n\nPrevious Step ({task.agent.name}):\n{result.get('response', '')}"
-                self.logger(f"⏱️  Time taken: {result.get('elapsed_time', 0)}s")
-            else:
-                self.logger(f"❌ Step {i} failed")
-                results[task.description] = {"error": "Task failed"}
+        on_token(step, kind, text), if given, receives each step's reasoning and
+        response tokens as they stream in.
+        """
+        log = logger or self.logger
+        log(f"\n🔍 Starting research workflow for: {topic}")
+        log("=" * 50)
+        
+        # The analysis agents don't depend on each other, so run them concurrently
+        parallel_tasks = self.tasks[:4]
+        synthesis_task = self.tasks[4]
         
-        return results
+        for i, task in enumerate(parallel_tasks, 1):
+            log(f"\n📋 Step {i}: {task.description}")
+            log(f"🤖 Agent: {task.agent.name}")
+            log(f"🎯 Executing task: {task.description}")
+        
+        # Yield in completion order, but keep the synthesis context in task order
+        context_parts = [""] * len(parallel_tasks)
+        for next_done in asyncio.as_completed([
+            self._run_task(i, task, topic, log, on_token) for i, task in enumerate(parallel_tasks)
+        ]):
+            index, task, result = await next_done
+            step_result, context_parts[index] = record_step(index + 1, task, result, log)
+            yield task.description, step_result
+        
+        # Synthesis needs every prior analysis
+        step = len(self.tasks)
+        log(f"\n📋 Step {step}: {synthesis_task.description}")
+        log(f"🤖 Agent: {synthesis_task.agent.name}")
+        log(f"🎯 Executing task: {synthesis_task.description}")
+        context = join_context(context_parts)
+        result = await self.llm.execute(
+            self._build_synthesis_prompt(topic, context),
+            logger=log,
+            on_token=step_tokens(on_token, synthesis_task)
+        )
+        step_result, _ = record_step(step, synthesis_task, result, log)
+        yield synthesis_task.description, step_result
 
 async def main():
     # Get research topic
     topic = input("\n🎯 Enter research topic: ")
     
-    # Create and run workflow
+    # Create and run workflow, displaying each step as it completes
     workflow = ResearchWorkflow()
-    results = await workflow.process_topic(topic)
     
-    # Display results
-    print("\n📊 Final Results")
+    print("\n📊 Results")
     print("=" * 50)
     
     total_time = 0
-    for step, result in results.items():
+    async for step, result in workflow.process_topic(topic):
         print(f"\n### {step}")
         if "error" in result:
             print(f"❌ {result['error']}")
@@ -259,4 +267,4 @@ async def main():
     print(f"\nTotal Analysis Time: {total_time}s")
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
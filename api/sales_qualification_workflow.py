@@ -1,32 +1,87 @@
 from praisonaiagents import Agent, Task, PraisonAIAgents
 import asyncio
-import requests
-from dotenv import load_dotenv
-from duckduckgo_search import DDGS
-from typing import List, Dict, Optional, Callable
+from typing import Dict, Optional, Callable, Tuple, AsyncIterator
+from .settings import load_env
 from .proxy_config import ProxyAPITool, ProxyAPIConfig
+from .search import internet_search_tool
+from ._workflow_steps import record_step, join_context, step_tokens
 
 # Load environment variables
-load_dotenv()
-
-def internet_search_tool(query: str) -> List[Dict]:
-    """DuckDuckGo search tool"""
-    results = []
-    try:
-        ddgs = DDGS()
-        for result in ddgs.text(keywords=query, max_results=5):
-            results.append({
-                "title": result.get("title", ""),
-                "url": result.get("link", ""),
-                "snippet": result.get("body", "")
-            })
-    except Exception as e:
-        print(f"⚠️ Search error: {str(e)}")
-    return results
+load_env()
+
+# Task prompt text that doesn't depend on the company, built once per workflow
+TASK_PROMPT_BODY = """Your Task: {description}
+As a {role}, conduct exhaustive research and provide:
+
+1. COMPREHENSIVE ANALYSIS:
+   - Company Overview: history, mission, vision
+   - Leadership Team: key executives, backgrounds
+   - Financial Information: revenue, funding, growth metrics
+   - Product/Service Portfolio: detailed offerings
+   - Technology Stack: systems and tools used
+   - Recent News: developments, announcements, press coverage
+   - Market Position: industry standing, market share
+   - Customer Base: target markets, key clients
+   - Partnerships: strategic relationships, integrations
+   - Growth Trajectory: expansion plans, historical growth
+   - Company Culture: values, employee reviews, workplace
+   - Legal/Regulatory Status: compliance, licenses, permits
+   - Geographic Presence: office locations, market reach
+   - Competitive Advantages: unique selling propositions
+   - Challenges: identified issues, market obstacles
+
+2. KEY FINDINGS:
+   - Most significant discoveries
+   - Unique insights
+   - Critical data points
+   - Notable trends
+
+3. INFORMATION SOURCES:
+   - List all sources used
+   - Credibility assessment
+   - Data freshness/timeliness
+   - Information gaps identified
+
+Focus on gathering and presenting ALL available accurate information. Be thorough and exhaustive in your research. Include both positive and negative findings. Cite sources where possible.
+
+If you find conflicting information, present all versions with source context. If you're unsure about something, explicitly state it rather than making assumptions.
+
+Be analytical and fact-focused in your response."""
+
+# Rough characters per token for English text
+CHARS_PER_TOKEN = 4
+
+def _summarize(text: str, limit_tokens: int = 500) -> str:
+    """Cut a response down to its headings, bullets and paragraph lead sentences"""
+    budget = limit_tokens * CHARS_PER_TOKEN
+    if len(text) <= budget:
+        return text
+    
+    kept = []
+    used = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if not (line.startswith(("#", "-", "*", "•")) or line[0].isdigit()):
+            # Plain paragraph; its first sentence usually carries the point
+            head, sep, _ = line.partition(". ")
+            line = head + sep.strip()
+        remaining = budget - used
+        if len(line) + 1 > remaining:
+            # Keep what fits of the line that overflows rather than dropping it
+            if remaining > 1:
+                kept.append(line[:remaining - 1])
+            break
+        kept.append(line)
+        used += len(line) + 1
+    # Blank-line-only text keeps nothing above; never hand synthesis an empty step
+    return "\n".join(kept) or text[:budget]
 
 class CompanyResearchAgent(Agent):
     """Agent specialized in comprehensive company research and analysis"""
-    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None):
+    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None,
+                 llm: Optional[ProxyAPITool] = None):
         self.logger = logger or print
         super().__init__(
             name="Company Intelligence Gatherer",
@@ -34,12 +89,13 @@ class CompanyResearchAgent(Agent):
             goal="Gather and analyze comprehensive company information including history, operations, financials, team, and recent developments",
             backstory="Expert in deep corporate research with access to extensive business intelligence resources",
             tools=[internet_search_tool],
-            llm=ProxyAPITool(api_type=api_type, logger=logger)
+            llm=llm or ProxyAPITool(api_type=api_type, logger=logger)
         )
 
 class ComplianceAnalysisAgent(Agent):
     """Agent specialized in regulatory and operational analysis"""
-    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None):
+    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None,
+                 llm: Optional[ProxyAPITool] = None):
         self.logger = logger or print
         super().__init__(
             name="Operations Analyzer",
@@ -47,12 +103,13 @@ class ComplianceAnalysisAgent(Agent):
             goal="Research and document company's operational structure, locations, regulatory environment, and business model",
             backstory="Expert in business operations analysis and regulatory frameworks",
             tools=[internet_search_tool],
-            llm=ProxyAPITool(api_type=api_type, logger=logger)
+            llm=llm or ProxyAPITool(api_type=api_type, logger=logger)
         )
 
 class CompetitorAnalysisAgent(Agent):
     """Agent specialized in market and ecosystem analysis"""
-    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None):
+    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None,
+                 llm: Optional[ProxyAPITool] = None):
         self.logger = logger or print
         super().__init__(
             name="Market Intelligence Analyst",
@@ -60,12 +117,13 @@ class CompetitorAnalysisAgent(Agent):
             goal="Map out the company's complete business ecosystem, partnerships, competitors, and market position",
             backstory="Expert in competitive intelligence and market ecosystem analysis",
             tools=[internet_search_tool],
-            llm=ProxyAPITool(api_type=api_type, logger=logger)
+            llm=llm or ProxyAPITool(api_type=api_type, logger=logger)
         )
 
 class FitAssessmentAgent(Agent):
     """Agent specialized in comprehensive business analysis"""
-    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None):
+    def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER, logger: Optional[Callable] = None,
+                 llm: Optional[ProxyAPITool] = None):
         self.logger = logger or print
         super().__init__(
             name="Business Analyst",
@@ -73,7 +131,7 @@ class FitAssessmentAgent(Agent):
             goal="Synthesize all gathered information into a comprehensive company profile",
             backstory="Expert in business analysis and strategic intelligence synthesis",
             tools=[internet_search_tool],
-            llm=ProxyAPITool(api_type=api_type, logger=logger)
+            llm=llm or ProxyAPITool(api_type=api_type, logger=logger)
         )
 
 class SalesQualificationWorkflow:
@@ -82,11 +140,14 @@ class SalesQualificationWorkflow:
         self.logger = logger or print
         self.api_type = api_type
         
-        # Initialize agents with logger and API type
-        self.company_agent = CompanyResearchAgent(api_type=api_type, logger=logger)
-        self.compliance_agent = ComplianceAnalysisAgent(api_type=api_type, logger=logger)
-        self.competitor_agent = CompetitorAnalysisAgent(api_type=api_type, logger=logger)
-        self.fit_agent = FitAssessmentAgent(api_type=api_type, logger=logger)
+        # One LLM tool for all agents; they only differ in their prompts
+        self.llm = ProxyAPITool(api_type=api_type, logger=logger)
+        
+        # Initialize agents with logger and the shared LLM tool
+        self.company_agent = CompanyResearchAgent(api_type=api_type, logger=logger, llm=self.llm)
+        self.compliance_agent = ComplianceAnalysisAgent(api_type=api_type, logger=logger, llm=self.llm)
+        self.competitor_agent = CompetitorAnalysisAgent(api_type=api_type, logger=logger, llm=self.llm)
+        self.fit_agent = FitAssessmentAgent(api_type=api_type, logger=logger, llm=self.llm)
         
         # Create tasks for each agent
         self.tasks = [
@@ -111,98 +172,82 @@ class SalesQualificationWorkflow:
                 agent=self.fit_agent
             )
         ]
-    
-    async def process_company(self, company_name: str) -> Dict:
-        """Process a company through the comprehensive research workflow"""
-        self.logger(f"\n🔍 Starting comprehensive company analysis for: {company_name}")
-        self.logger("=" * 50)
         
-        results = {}
-        context = ""
-        
-        for i, task in enumerate(self.tasks, 1):
-            self.logger(f"\n📋 Step {i}: {task.description}")
-            self.logger(f"🤖 Agent: {task.agent.name}")
-            
-            # Prepare prompt with context from previous steps
-            prompt = f"""Target Company: {company_name}
-
-Previous Analysis:
-{context}
-
-Your Task: {task.description}
-As a {task.agent.role}, conduct exhaustive research and provide:
-
-1. COMPREHENSIVE ANALYSIS:
-   - Company Overview: history, mission, vision
-   - Leadership Team: key executives, backgrounds
-   - Financial Information: revenue, funding, growth metrics
-   - Product/Service Portfolio: detailed offerings
-   - Technology Stack: systems and tools used
-   - Recent News: developments, announcements, press coverage
-   - Market Position: industry standing, market share
-   - Customer Base: target markets, key clients
-   - Partnerships: strategic relationships, integrations
-   - Growth Trajectory: expansion plans, historical growth
-   - Company Culture: values, employee reviews, workplace
-   - Legal/Regulatory Status: compliance, licenses, permits
-   - Geographic Presence: office locations, market reach
-   - Competitive Advantages: unique selling propositions
-   - Challenges: identified issues, market obstacles
-
-2. KEY FINDINGS:
-   - Most significant discoveries
-   - Unique insights
-   - Critical data points
-   - Notable trends
-
-3. INFORMATION SOURCES:
-   - List all sources used
-   - Credibility assessment
-   - Data freshness/timeliness
-   - Information gaps identified
-
-Focus on gathering and presenting ALL available accurate information. Be thorough and exhaustive in your research. Include both positive and negative findings. Cite sources where possible.
-
-If you find conflicting information, present all versions with source context. If you're unsure about something, explicitly state it rather than making assumptions.
+        # Per-task prompt text; only the company name and context change per run
+        self._prompt_templates = [
+            TASK_PROMPT_BODY.format(description=task.description, role=task.agent.role)
+            for task in self.tasks
+        ]
+    
+    def _build_prompt(self, index: int, company_name: str, context: str) -> str:
+        """Build a task prompt with context from previous steps"""
+        return "".join((
+            "Target Company: ", company_name,
+            "\n\nPrevious Analysis:\n", context,
+            "\n\n", self._prompt_templates[index]
+        ))
 
-Be analytical and fact-focused in your response."""
+    async def _run_task(self, index: int, task: Task, company_name: str, log: Callable,
+                        on_token: Optional[Callable] = None) -> Tuple[int, Task, Optional[dict]]:
+        """Run a research task, tagging the result with its position"""
+        prompt = self._build_prompt(index, company_name, "")
+        return index, task, await self.llm.execute(prompt, logger=log, on_token=step_tokens(on_token, task))
+    
+    async def process_company(self, company_name: str, logger: Optional[Callable] = None,
+                              on_token: Optional[Callable] = None) -> AsyncIterator[Tuple[str, Dict]]:
+        """Process a company, yielding (step, result) pairs as each step finishes
 
-            # Execute task
-            self.logger(f"🎯 Executing task: {task.description}")
-            result = await task.agent.llm.execute(prompt)
-            
-            if result:
-                self.logger(f"✅ Step {i} complete")
-                # Add to results
-                results[task.description] = {
-                    "reasoning": result.get("reasoning", ""),
-                    "response": result.get("response", ""),
-                    "time": result.get("elapsed_time", 0)
-                }
-                # Update context for next step
-                context += f"\n\nPrevious Step ({task.agent.name}):\n{result.get('response', '')}"
-                self.logger(f"⏱️  Time taken: {result.get('elapsed_time', 0)}s")
-            else:
-                self.logger(f"❌ Step {i} failed")
-                results[task.description] = {"error": "Task failed"}
+        on_token(step, kind, text), if given, receives each step's reasoning and
+        response tokens as they stream in.
+        """
+        log = logger or self.logger
+        log(f"\n🔍 Starting comprehensive company analysis for: {company_name}")
+        log("=" * 50)
         
-        return results
+        # Company, operations and market research are independent, so run them concurrently
+        parallel_tasks = self.tasks[:3]
+        synthesis_task = self.tasks[3]
+        
+        for i, task in enumerate(parallel_tasks, 1):
+            log(f"\n📋 Step {i}: {task.description}")
+            log(f"🤖 Agent: {task.agent.name}")
+            log(f"🎯 Executing task: {task.description}")
+        
+        context_chunks = [""] * len(parallel_tasks)
+        for next_done in asyncio.as_completed([
+            self._run_task(i, task, company_name, log, on_token) for i, task in enumerate(parallel_tasks)
+        ]):
+            index, task, result = await next_done
+            step_result, context_chunks[index] = record_step(index + 1, task, result, log, summarize=_summarize)
+            yield task.description, step_result
+        
+        context = join_context(context_chunks)
+        
+        # The profile synthesis needs everything gathered so far
+        step = len(self.tasks)
+        log(f"\n📋 Step {step}: {synthesis_task.description}")
+        log(f"🤖 Agent: {synthesis_task.agent.name}")
+        log(f"🎯 Executing task: {synthesis_task.description}")
+        result = await self.llm.execute(
+            self._build_prompt(step - 1, company_name, context),
+            logger=log,
+            on_token=step_tokens(on_token, synthesis_task)
+        )
+        step_result, _ = record_step(step, synthesis_task, result, log)
+        yield synthesis_task.description, step_result
 
 async def main():
     # Get company name
     company_name = input("\n🎯 Enter company name to qualify: ")
     
-    # Create and run workflow
+    # Create and run workflow, displaying each step as it completes
     workflow = SalesQualificationWorkflow()
-    results = await workflow.process_company(company_name)
     
-    # Display results
     print("\n📊 Sales Qualification Results")
     print("=" * 50)
     
     total_time = 0
-    for step, result in results.items():
+    async for step, result in workflow.process_company(company_name):
         print(f"\n### {step}")
         if "error" in result:
             print(f"❌ {result['error']}")
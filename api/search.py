@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from duckduckgo_search import DDGS
+from typing import List, Dict, Optional, Tuple
+
+# Max results requested per search
+MAX_SEARCH_RESULTS = 5
+
+class _SearchCache:
+    """LRU of recent search results that expire after a TTL"""
+    def __init__(self, maxsize: int = 256, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()  # The cache is process-wide, not tied to one event loop or thread
+    
+    def get(self, key: Tuple[str, int]) -> Optional[List[Dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            timestamp, results = entry
+            if time.monotonic() - timestamp >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return [dict(result) for result in results]
+    
+    def set(self, key: Tuple[str, int], results: List[Dict]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), [dict(result) for result in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+_search_cache = _SearchCache()
+
+# DDGS sets up an HTTP client when constructed, so each worker thread keeps and reuses one
+_ddgs_local = threading.local()
+
+def _get_ddgs() -> DDGS:
+    ddgs = getattr(_ddgs_local, "ddgs", None)
+    if ddgs is None:
+        ddgs = _ddgs_local.ddgs = DDGS()
+    return ddgs
+
+# Searches currently running, so concurrent duplicates can await the same request
+_inflight: Dict[tuple, asyncio.Task] = {}
+
+async def _search(query: str, key: Tuple[str, int], flight_key: tuple) -> List[Dict]:
+    """Run a DuckDuckGo search and cache its results"""
+    try:
+        # DDGS is blocking, so run it in a worker thread to keep the event loop free
+        results = await asyncio.to_thread(lambda: [
+            {"title": result["title"], "url": result["href"], "snippet": result["body"]}
+            for result in _get_ddgs().text(keywords=query, max_results=MAX_SEARCH_RESULTS)
+        ])
+        _search_cache.set(key, results)
+        return results
+    except Exception as e:
+        print(f"⚠️ Search error: {str(e)}")
+        return []
+    finally:
+        del _inflight[flight_key]
+
+async def internet_search_tool(query: str) -> List[Dict]:
+    """
+    Perform Internet Search using DuckDuckGo
+    
+    Args:
+        query (str): The search query string
+        
+    Returns:
+        List[Dict]: List of search results containing title, URL, and snippet
+    """
+    # Agents often repeat the same search, so serve recent results from the cache
+    key = (query.strip().lower(), MAX_SEARCH_RESULTS)
+    cached = _search_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    # Tasks belong to one event loop, so searches are only shared within it
+    loop = asyncio.get_running_loop()
+    flight_key = (loop, key)
+    flight = _inflight.get(flight_key)
+    if flight is None:
+        # The search runs as its own task, so cancelling one caller doesn't end it for the rest
+        flight = _inflight[flight_key] = loop.create_task(_search(query, key, flight_key))
+    return [dict(result) for result in await asyncio.shield(flight)]
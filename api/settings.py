@@ -0,0 +1,31 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+from dotenv import load_dotenv
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+API_DIR = Path(__file__).resolve().parent
+
+class Settings(BaseSettings):
+    """Environment configuration, read once per process"""
+    # Root .env holds the API key and log level, api/.env the proxy settings;
+    # both are optional and real environment variables take precedence
+    model_config = SettingsConfigDict(
+        env_file=(API_DIR.parent / ".env", API_DIR / ".env"),
+        extra="ignore"
+    )
+
+    openrouter_api_key: Optional[str] = None
+    loglevel: str = "warning"
+    use_proxy: bool = False
+    mitmproxy_url: str = "http://127.0.0.1:8080"  # mitmproxy default address
+
+@lru_cache
+def get_settings() -> Settings:
+    """Get the cached settings for this process"""
+    return Settings()
+
+@lru_cache
+def load_env() -> bool:
+    """Load .env into os.environ once per process, however many modules ask"""
+    return load_dotenv()
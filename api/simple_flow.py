@@ -1,36 +1,12 @@
 from praisonaiagents import Agent
 import asyncio
-import requests
-from dotenv import load_dotenv
-from duckduckgo_search import DDGS
-from typing import List, Dict
+from typing import AsyncIterator
+from .settings import load_env
 from .proxy_config import ProxyAPIConfig, ProxyAPITool
+from .search import internet_search_tool
 
 # Load environment variables
-load_dotenv()
-
-def internet_search_tool(query: str) -> List[Dict]:
-    """
-    Perform Internet Search using DuckDuckGo
-    
-    Args:
-        query (str): The search query string
-        
-    Returns:
-        List[Dict]: List of search results containing title, URL, and snippet
-    """
-    results = []
-    try:
-        ddgs = DDGS()
-        for result in ddgs.text(keywords=query, max_results=5):
-            results.append({
-                "title": result.get("title", ""),
-                "url": result.get("link", ""),
-                "snippet": result.get("body", "")
-            })
-    except Exception as e:
-        print(f"⚠️ Search error: {str(e)}")
-    return results
+load_env()
 
 class ResearchAgent(Agent):
     def __init__(self, api_type: str = ProxyAPIConfig.OPENROUTER):
@@ -43,14 +19,14 @@ class ResearchAgent(Agent):
             llm=ProxyAPITool(api_type=api_type)  # Use our proxy with specified API type
         )
     
-    async def process_topic(self, topic: str) -> dict:
-        """Process a research topic through our agent"""
+    async def _build_prompt(self, topic: str) -> str:
+        """Search the web for a topic and build the research prompt from the results"""
         print(f"\n🔍 Analyzing topic: {topic}")
         print("=" * 50)
         
         # First, gather internet research using the tool
         print("\n🌐 Gathering internet research...")
-        search_results = self.tools[0](topic)  # Call the tool function directly
+        search_results = await self.tools[0](topic)  # Call the tool function directly
         
         if not search_results:
             print("⚠️ No search results found. Proceeding with analysis using only AI knowledge.")
@@ -63,7 +39,7 @@ class ResearchAgent(Agent):
             ])
         
         # Construct research prompt with search results
-        prompt = f"""Analyze this research topic: {topic}
+        return f"""Analyze this research topic: {topic}
 
 Available internet research:
 {search_context}
@@ -75,6 +51,10 @@ Based on both the internet research and your knowledge, please provide:
 4. Practical applications
 
 Be thorough but comprehensive, and incorporate relevant findings from the internet research. your output should read like a report"""
+    
+    async def process_topic(self, topic: str) -> dict:
+        """Process a research topic through our agent"""
+        prompt = await self._build_prompt(topic)
         
         # Process through our proxy API
         result = await self.llm.execute(prompt)
@@ -90,6 +70,12 @@ Be thorough but comprehensive, and incorporate relevant findings from the intern
         else:
             print("❌ Analysis failed")
             return None
+    
+    async def stream_topic(self, topic: str) -> AsyncIterator[dict]:
+        """Process a research topic, yielding reasoning/response events as tokens arrive"""
+        prompt = await self._build_prompt(topic)
+        async for event in self.llm.execute_stream(prompt):
+            yield event
 
 async def main():
     # Get research topic
@@ -1,25 +1,131 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import asyncio
+import threading
+from collections import deque
 from datetime import datetime
+from typing import Optional
 
 from api.simple_flow import ResearchAgent
 from api.research_workflow import ResearchWorkflow
 from api.sales_qualification_workflow import SalesQualificationWorkflow
 from api.proxy_config import ProxyAPIConfig
 
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Start the event loop shared by every session, on a daemon thread that outlives reruns"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+def run_async(coro):
+    """Run a coroutine on the shared event loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+def iter_async(agen):
+    """Iterate an async generator on the shared event loop, one item at a time"""
+    try:
+        while True:
+            try:
+                yield run_async(agen.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        run_async(agen.aclose())
+
+def stream_result(events, reasoning_placeholder, response_placeholder) -> Optional[dict]:
+    """Render streamed reasoning and response tokens as they arrive; return the full result when done"""
+    parts = {"reasoning": [], "response": []}
+    placeholders = {"reasoning": reasoning_placeholder, "response": response_placeholder}
+    for event in events:
+        kind = event.get("type")
+        if kind in parts:
+            parts[kind].append(event["content"])
+            placeholders[kind].markdown("".join(parts[kind]))
+        elif kind == "done":
+            return {
+                "reasoning": "".join(parts["reasoning"]),
+                "response": "".join(parts["response"]),
+                "elapsed_time": event.get("elapsed_time", 'N/A')
+            }
+    return None  # The stream errored or ended early
+
+# Agents and workflows are shared by every session, one per API backend
+@st.cache_resource
+def get_simple_agent(api_type: str) -> ResearchAgent:
+    return ResearchAgent(api_type=api_type)
+
+@st.cache_resource
+def get_research_workflow(api_type: str) -> ResearchWorkflow:
+    return ResearchWorkflow(api_type=api_type)
+
+@st.cache_resource
+def get_sales_workflow(api_type: str) -> SalesQualificationWorkflow:
+    return SalesQualificationWorkflow(api_type=api_type)
+
+def format_step(step: str, result: dict, reasoning_title: str, response_title: str) -> str:
+    """Format one workflow step's result as markdown"""
+    if "error" in result:
+        return f"\n### ❌ {step}\n{result['error']}\n"
+    return f"""
+        ### 📋 {step}
+        
+        ⏱️ Time: {result.get('time', 0)}s
+        
+        #### 💭 {reasoning_title}
+        {result['reasoning']}
+        
+        #### 🔍 {response_title}
+        {result['response']}
+        
+        ---
+        """
+
 # Custom progress logger for Streamlit
 class StreamlitLogger:
+    MAX_LINES = 200  # Older lines drop off so each redraw stays small
+    
     def __init__(self, container):
         self.container = container
-        self.logs = []
+        self.logs = deque(maxlen=self.MAX_LINES)
+        # Workflows log from the shared loop thread, which serves every session
+        self.ctx = get_script_run_ctx()
     
     def log(self, message: str):
         timestamp = datetime.now().strftime("%H:%M:%S")
         log_entry = f"[{timestamp}] {message}"
         self.logs.append(log_entry)
-        # Update the container with all logs
+        # Update the container with the most recent logs, as this logger's session
+        add_script_run_ctx(threading.current_thread(), self.ctx)
         self.container.code('\n'.join(self.logs), language='bash')
 
+class StreamlitStepStreamer:
+    """Show each running workflow step's tokens live, one placeholder per step"""
+    
+    def __init__(self, container):
+        self.container = container
+        self.placeholders = {}
+        self.parts = {}
+        # Tokens arrive on the shared loop thread, like StreamlitLogger's lines
+        self.ctx = get_script_run_ctx()
+    
+    def feed(self, step: str, kind: str, text: str):
+        add_script_run_ctx(threading.current_thread(), self.ctx)
+        if step not in self.placeholders:
+            self.placeholders[step] = self.container.empty()
+            self.parts[step] = {"reasoning": [], "response": []}
+        self.parts[step][kind].append(text)
+        reasoning = "".join(self.parts[step]["reasoning"])
+        response = "".join(self.parts[step]["response"])
+        self.placeholders[step].markdown(f"**⏳ {step}**\n\n💭 {reasoning}\n\n🔍 {response}")
+    
+    def finish(self, step: str):
+        """Drop a step's live view once its formatted result is shown"""
+        self.parts.pop(step, None)
+        placeholder = self.placeholders.pop(step, None)
+        if placeholder is not None:
+            placeholder.empty()
+
 st.set_page_config(
     page_title="Research Analysis Assistant",
     page_icon="🔬",
@@ -58,12 +164,6 @@ if 'workflow_type' not in st.session_state:
     st.session_state.workflow_type = 'simple'
 if 'api_type' not in st.session_state:
     st.session_state.api_type = ProxyAPIConfig.OPENROUTER
-if 'simple_agent' not in st.session_state:
-    st.session_state.simple_agent = ResearchAgent()
-if 'multi_agent_workflow' not in st.session_state:
-    st.session_state.multi_agent_workflow = None
-if 'sales_workflow' not in st.session_state:
-    st.session_state.sales_workflow = None
 if 'messages' not in st.session_state:
     st.session_state.messages = []
 
@@ -80,12 +180,7 @@ with st.sidebar:
     )
     
     # Update API type in session state
-    if api_type != st.session_state.api_type:
-        st.session_state.api_type = api_type
-        # Reset workflows when API changes
-        st.session_state.multi_agent_workflow = None
-        st.session_state.sales_workflow = None
-        st.session_state.simple_agent = ResearchAgent(api_type=api_type)
+    st.session_state.api_type = api_type
     
     # Workflow selector
     workflow_type = st.radio(
@@ -130,7 +225,7 @@ with st.sidebar:
         4. 📊 Impact Assessor
         5. 📝 Research Synthesizer
         
-        Each agent builds on the previous agent's analysis.
+        The first four agents work in parallel; the synthesizer combines their analyses.
         """)
     else:
         st.markdown(f"""
@@ -198,8 +293,17 @@ if prompt := st.chat_input("Enter your research topic..."):
                 logger.log("🌐 Initializing simple agent workflow...")
                 progress_placeholder = st.empty()
                 progress_placeholder.markdown("🌐 Gathering internet research...")
+                reasoning_placeholder = st.empty()
+                response_placeholder = st.empty()
                 
-                result = asyncio.run(st.session_state.simple_agent.process_topic(prompt))
+                # Show tokens as they arrive rather than waiting for the whole analysis
+                result = stream_result(
+                    iter_async(get_simple_agent(st.session_state.api_type).stream_topic(prompt)),
+                    reasoning_placeholder,
+                    response_placeholder
+                )
+                reasoning_placeholder.empty()
+                response_placeholder.empty()
                 
                 if result:
                     logger.log(f"✅ Analysis complete in {result.get('elapsed_time', 'N/A')}s")
@@ -240,42 +344,24 @@ if prompt := st.chat_input("Enter your research topic..."):
                 logger.log("🤖 Initializing multi-agent workflow...")
                 progress_placeholder = st.empty()
                 
-                # Initialize workflow with logger if needed
-                if st.session_state.multi_agent_workflow is None:
-                    st.session_state.multi_agent_workflow = ResearchWorkflow(api_type=st.session_state.api_type, logger=logger.log)
+                workflow = get_research_workflow(st.session_state.api_type)
+                # Format multi-agent results, showing each step as soon as it finishes
+                parts = ["<div class='research-results'>"]
+                total_time = 0
                 
-                results = asyncio.run(st.session_state.multi_agent_workflow.process_topic(prompt))
+                streamer = StreamlitStepStreamer(st.container())
+                for step, result in iter_async(workflow.process_topic(prompt, logger=logger.log, on_token=streamer.feed)):
+                    streamer.finish(step)
+                    parts.append(format_step(step, result, "Reasoning", "Analysis"))
+                    total_time += result.get('time', 0)
+                    progress_placeholder.markdown("".join(parts) + "</div>", unsafe_allow_html=True)
                 
-                if results:
-                    # Format multi-agent results
-                    response_md = "<div class='research-results'>"
-                    total_time = 0
-                    
-                    for step, result in results.items():
-                        if "error" in result:
-                            response_md += f"\n### ❌ {step}\n{result['error']}\n"
-                        else:
-                            time = result.get('time', 0)
-                            total_time += time
-                            response_md += f"""
-                            ### 📋 {step}
-                            
-                            ⏱️ Time: {time}s
-                            
-                            #### 💭 Reasoning
-                            {result['reasoning']}
-                            
-                            #### 🔍 Analysis
-                            {result['response']}
-                            
-                            ---
-                            """
-                    
-                    response_md += f"\n### ⌛ Total Analysis Time: {total_time}s"
-                    response_md += "</div>"
+                if len(parts) > 1:
+                    parts.append(f"\n### ⌛ Total Analysis Time: {total_time}s")
+                    parts.append("</div>")
+                    response_md = "".join(parts)
                     
-                    progress_placeholder.empty()
-                    st.markdown(response_md, unsafe_allow_html=True)
+                    progress_placeholder.markdown(response_md, unsafe_allow_html=True)
                     status.update(label="✅ Analysis Complete", state="complete")
                     
                     # Add to chat history
@@ -296,42 +382,24 @@ if prompt := st.chat_input("Enter your research topic..."):
                 logger.log("🤖 Initializing sales qualification workflow...")
                 progress_placeholder = st.empty()
                 
-                # Initialize workflow with logger if needed
-                if st.session_state.sales_workflow is None:
-                    st.session_state.sales_workflow = SalesQualificationWorkflow(api_type=st.session_state.api_type, logger=logger.log)
+                workflow = get_sales_workflow(st.session_state.api_type)
+                # Format sales qualification results, showing each step as soon as it finishes
+                parts = ["<div class='research-results'>"]
+                total_time = 0
                 
-                results = asyncio.run(st.session_state.sales_workflow.process_company(prompt))
+                streamer = StreamlitStepStreamer(st.container())
+                for step, result in iter_async(workflow.process_company(prompt, logger=logger.log, on_token=streamer.feed)):
+                    streamer.finish(step)
+                    parts.append(format_step(step, result, "Analysis Process", "Key Findings"))
+                    total_time += result.get('time', 0)
+                    progress_placeholder.markdown("".join(parts) + "</div>", unsafe_allow_html=True)
                 
-                if results:
-                    # Format sales qualification results
-                    response_md = "<div class='research-results'>"
-                    total_time = 0
-                    
-                    for step, result in results.items():
-                        if "error" in result:
-                            response_md += f"\n### ❌ {step}\n{result['error']}\n"
-                        else:
-                            time = result.get('time', 0)
-                            total_time += time
-                            response_md += f"""
-                            ### 📋 {step}
-                            
-                            ⏱️ Time: {time}s
-                            
-                            #### 💭 Analysis Process
-                            {result['reasoning']}
-                            
-                            #### 🔍 Key Findings
-                            {result['response']}
-                            
-                            ---
-                            """
+                if len(parts) > 1:
+                    parts.append(f"\n### ⌛ Total Analysis Time: {total_time}s")
+                    parts.append("</div>")
+                    response_md = "".join(parts)
                     
-                    response_md += f"\n### ⌛ Total Analysis Time: {total_time}s"
-                    response_md += "</div>"
-                    
-                    progress_placeholder.empty()
-                    st.markdown(response_md, unsafe_allow_html=True)
+                    progress_placeholder.markdown(response_md, unsafe_allow_html=True)
                     status.update(label="✅ Analysis Complete", state="complete")
                     
                     # Add to chat history
@@ -5,13 +5,16 @@ setup(
     version="0.1.0",
     packages=find_packages(),
     install_requires=[
-        "requests",
         "python-dotenv",
+        "pydantic-settings",
         "duckduckgo_search",
         "honcho",
         "httpx",
+        "orjson",
         "fastapi",
         "uvicorn",
+        "uvloop; sys_platform != 'win32'",
+        "httptools",
         "streamlit"
     ],
 ) 
\ No newline at end of file
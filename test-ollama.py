@@ -1,16 +1,23 @@
-from openai import OpenAI
+import asyncio
+import httpx
+from openai import AsyncOpenAI
 
-client = OpenAI(
-    base_url='http://localhost:11434/v1',
-    api_key='ollama'
-)
+async def main():
+    async with httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=8)) as http_client:
+        client = AsyncOpenAI(
+            base_url='http://localhost:11434/v1',
+            api_key='ollama',
+            http_client=http_client
+        )
 
-response = client.chat.completions.create(
-    model="deepseek-r1:8b",
-    messages=[
-        {"role": "system", "content": "You are a helpful assistant."},
-        {"role": "user", "content": "Hello!"}
-    ]
-)
-print(response.choices[0].message.content)
+        response = await client.chat.completions.create(
+            model="deepseek-r1:8b",
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "user", "content": "Hello!"}
+            ]
+        )
+        print(response.choices[0].message.content)
 
+if __name__ == "__main__":
+    asyncio.run(main())